@@ -6,9 +6,10 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 import xgboost as xgb
 from datetime import datetime, timedelta
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, deque
 import holidays
 import json
+import threading
 import warnings
 from flask import Flask, render_template, jsonify, request, send_from_directory
 warnings.filterwarnings('ignore')
@@ -178,6 +179,142 @@ class SeasonalityOptimizer:
         else:
             return 'Post-Monsoon'
 
+class MealHistoryFeatures:
+    """Leakage-free meal history features computed from past days only.
+
+    Servings are accumulated into per-day prefix sums and last-seen arrays
+    over encoded meal ids, so every window lookup is O(meals) and the same
+    state answers both training rows and live predictions.
+    """
+    def __init__(self, windows=(7, 30), recency_half_life=7, max_gap_days=365):
+        self.windows = tuple(windows)
+        self.recency_decay = 0.5 ** (1.0 / recency_half_life)
+        self.max_gap_days = max_gap_days
+        self.meals = []
+        self.origin = None
+        self._meal_index = {}
+        # Row k holds servings / last served day over days strictly before k
+        self._prefix_counts = None
+        self._last_seen = None
+        # Last three servings in log order, mirroring prev_meal_1..3 in training
+        self._recent = deque(maxlen=3)
+        self._latest_day = -1
+        # Serving threads read the arrays while update() may grow them
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def feature_names(self):
+        ids = range(len(self.meals))
+        names = []
+        for window in self.windows:
+            names += [f'hist_count_{window}d_{i}' for i in ids]
+        names += [f'hist_days_since_{i}' for i in ids]
+        names += [f'hist_recency_{i}' for i in ids]
+        return names
+
+    def _day_index(self, dates):
+        if not pd.api.types.is_list_like(dates):
+            dates = [dates]
+        dates = pd.DatetimeIndex(pd.to_datetime(dates)).normalize()
+        return np.asarray((dates - self.origin).days)
+
+    def fit(self, dates, meals):
+        """Build the cumulative history state from a dated meal log"""
+        meals = pd.Series(meals).reset_index(drop=True)
+        self.meals = sorted(meals.unique())
+        self._meal_index = {meal: i for i, meal in enumerate(self.meals)}
+        self.origin = pd.to_datetime(dates).min().normalize()
+
+        days = self._day_index(dates)
+        codes = meals.map(self._meal_index).values
+        daily = np.zeros((days.max() + 1, len(self.meals)), dtype=np.int64)
+        np.add.at(daily, (days, codes), 1)
+
+        served_on = np.where(daily > 0, np.arange(len(daily))[:, None], -1)
+        self._prefix_counts = np.vstack([
+            np.zeros((1, len(self.meals)), dtype=np.int64),
+            np.cumsum(daily, axis=0)
+        ])
+        self._last_seen = np.vstack([
+            np.full((1, len(self.meals)), -1, dtype=np.int64),
+            np.maximum.accumulate(served_on, axis=0)
+        ])
+        self._recent = deque(meals.iloc[-3:], maxlen=3)
+        self._latest_day = days.max()
+        return self
+
+    def transform(self, dates):
+        """Return history features for each date using only earlier days"""
+        days = self._day_index(dates)
+        blocks = []
+        with self._lock:
+            n_days = len(self._prefix_counts) - 1
+            current = np.clip(days, 0, n_days)
+            for window in self.windows:
+                start = np.clip(days - window, 0, n_days)
+                blocks.append(self._prefix_counts[current] - self._prefix_counts[start])
+            last_seen = self._last_seen[current]
+
+        never_seen = last_seen < 0
+        days_since = np.minimum(days[:, None] - last_seen, self.max_gap_days)
+        days_since = np.where(never_seen, self.max_gap_days, days_since)
+        blocks.append(days_since)
+        blocks.append(np.where(never_seen, 0.0, self.recency_decay ** days_since))
+
+        index = dates.index if isinstance(dates, pd.Series) else None
+        return pd.DataFrame(np.hstack(blocks), columns=self.feature_names, index=index)
+
+    def fit_transform(self, dates, meals):
+        return self.fit(dates, meals).transform(dates)
+
+    def update(self, date, meal):
+        """Record a served meal so later lookups see it without refitting"""
+        if meal not in self._meal_index:
+            raise ValueError(f"Unknown meal: {meal}")
+        day = self._day_index(date)[0]
+        if day < 0:
+            raise ValueError("Cannot record a meal before the start of the history")
+
+        with self._lock:
+            # Each padded day costs a row in both arrays, so cap how far ahead we grow
+            last_day = len(self._prefix_counts) - 2
+            if day > last_day + self.max_gap_days:
+                raise ValueError(
+                    f"Cannot record a meal more than {self.max_gap_days} days past the end of the history"
+                )
+
+            missing = day + 2 - len(self._prefix_counts)
+            if missing > 0:
+                self._prefix_counts = np.vstack(
+                    [self._prefix_counts, np.repeat(self._prefix_counts[-1:], missing, axis=0)]
+                )
+                self._last_seen = np.vstack(
+                    [self._last_seen, np.repeat(self._last_seen[-1:], missing, axis=0)]
+                )
+
+            code = self._meal_index[meal]
+            self._prefix_counts[day + 1:, code] += 1
+            self._last_seen[day + 1:, code] = np.maximum(self._last_seen[day + 1:, code], day)
+
+            # Back-filled servings change the counts but not the latest sequence
+            if day >= self._latest_day:
+                self._recent.append(meal)
+                self._latest_day = day
+
+    def recent_meals(self):
+        """Last three served meals, newest first, repeats included"""
+        with self._lock:
+            return list(reversed(self._recent))
+
 class UserPreferences:
     def __init__(self):
         self.preferences = {
@@ -274,6 +411,7 @@ class MealPredictionModel:
         self.nutritional_optimizer = NutritionalOptimizer()
         self.variety_optimizer = MealVarietyOptimizer()
         self.seasonality_optimizer = SeasonalityOptimizer()
+        self.history_features = MealHistoryFeatures()
         
     def _get_meal_nutrition(self, meal):
         """Get nutritional information for a meal"""
@@ -295,8 +433,10 @@ class MealPredictionModel:
                 lambda x: self._get_meal_nutrition(x)[nutrient]
             )
             
-            # Calculate running daily totals
-            df[f'daily_{nutrient}'] = df.groupby(df['Date'].dt.date)[f'meal_{nutrient}'].cumsum()
+            # Calculate running daily totals consumed before this meal
+            df[f'daily_{nutrient}'] = (
+                df.groupby(df['Date'].dt.date)[f'meal_{nutrient}'].cumsum() - df[f'meal_{nutrient}']
+            )
             
             # Calculate percentage of daily target
             target = self.user_prefs.preferences.get(f'{nutrient}_target', 2000)
@@ -330,9 +470,8 @@ class MealPredictionModel:
         df['days_to_next_holiday'] = df['Date'].apply(self._days_to_next_holiday)
         
         # Meal patterns
-        meal_counts = df['Meal'].value_counts()
-        df['meal_frequency'] = df['Meal'].map(meal_counts)
         df = self._add_previous_meals(df)
+        df = pd.concat([df, self.history_features.transform(df['Date'])], axis=1)
         
         # Nutritional features
         self._add_nutritional_features(df)
@@ -342,8 +481,8 @@ class MealPredictionModel:
         df['next_meal_prob'] = 0.0
         if len(self.meal_combinations) > 0:
             df['next_meal_prob'] = df.apply(
-                lambda row: self.meal_combinations[row['Meal']].most_common(1)[0][1]
-                if row['Meal'] in self.meal_combinations and len(self.meal_combinations[row['Meal']]) > 0
+                lambda row: self.meal_combinations[row['prev_meal_1']].most_common(1)[0][1]
+                if row['prev_meal_1'] in self.meal_combinations and len(self.meal_combinations[row['prev_meal_1']]) > 0
                 else 0,
                 axis=1
             )
@@ -362,6 +501,7 @@ class MealPredictionModel:
     
     def _days_to_next_holiday(self, date):
         """Calculate days until next holiday"""
+        date = pd.Timestamp(date).date()
         next_holiday = min((d for d in self.indian_holidays if d > date), default=date)
         return (next_holiday - date).days
     
@@ -393,11 +533,57 @@ class MealPredictionModel:
         
         return df
     
+    def _prepare_prediction_data(self, date, previous_meals, daily_nutrition=None):
+        """Build a single feature row for prediction from the stored history state"""
+        date = pd.Timestamp(date)
+        if daily_nutrition is None:
+            daily_nutrition = {}
+        
+        row = {
+            'day_of_week': date.dayofweek,
+            'month': date.month,
+            'is_weekend': int(date.dayofweek >= 5),
+            'day_of_month': date.day,
+            'is_holiday': int(date in self.indian_holidays),
+            'unique_meals_last_3_days': len(set(previous_meals[:3])),
+            'temp_factor': self._approximate_temperature(pd.Series([date])).iloc[0]
+        }
+        
+        for nutrient in ['calories', 'protein', 'carbs', 'fiber']:
+            target = self.user_prefs.preferences.get(f'{nutrient}_target', 2000)
+            row[f'{nutrient}_percent'] = daily_nutrition.get(nutrient, 0) / target
+        
+        last_meal = previous_meals[0]
+        row['next_meal_prob'] = (
+            self.meal_combinations[last_meal].most_common(1)[0][1]
+            if len(self.meal_combinations.get(last_meal, {})) > 0
+            else 0
+        )
+        
+        season = self.seasonality_optimizer._get_indian_season(date)
+        for col in self.feature_cols:
+            if col.startswith('season_'):
+                row[col] = int(col == f'season_{season}')
+        
+        prev_meal_encoded = self.label_encoder.transform(previous_meals[:3])
+        for i in range(1, 4):
+            row[f'prev_meal_{i}_encoded'] = prev_meal_encoded[i - 1]
+        
+        # History lookups are O(meals) against the state built during training
+        row.update(self.history_features.transform(date).iloc[0].to_dict())
+        
+        return pd.DataFrame([row])[self.feature_cols]
+    
+    def _prepare_features(self, pred_df):
+        """Scale a prediction feature frame the same way as the training data"""
+        return self.scaler.transform(pred_df[self.feature_cols].values)
+    
     def train(self, df):
         """Train the model with the given data"""
         # Store known meals and update combinations
         self.known_meals = set(df['Meal'].unique())
         self._update_meal_combinations(df)
+        self.history_features.fit(pd.to_datetime(df['Date']), df['Meal'])
         
         # Prepare features
         df = self.prepare_features(df)
@@ -408,10 +594,11 @@ class MealPredictionModel:
         # Prepare feature matrix
         self.feature_cols = [
             'day_of_week', 'month', 'is_weekend', 'day_of_month',
-            'is_holiday', 'meal_frequency', 'unique_meals_last_3_days',
+            'is_holiday', 'unique_meals_last_3_days',
             'temp_factor', 'calories_percent', 'protein_percent',
             'carbs_percent', 'fiber_percent', 'next_meal_prob'
         ] + [col for col in df.columns if col.startswith('season_')]
+        self.feature_cols += self.history_features.feature_names
         
         # Add previous meals encoding
         for i in range(1, 4):
@@ -465,13 +652,21 @@ class MealPredictionModel:
             'feature_importance': feature_importance
         }
     
+    def record_meal(self, meal, date=None):
+        """Add a served meal to the history state used for live predictions"""
+        if date is None:
+            date = datetime.now()
+        self.history_features.update(date, meal)
+    
     def predict_next_meal(self, date=None, previous_meals=None, daily_nutrition=None, weekly_nutrition=None, time_of_day=None):
         """Predict next meal with enhanced optimization"""
         if date is None:
             date = datetime.now()
             
         if previous_meals is None:
-            previous_meals = [list(self.known_meals)[0]] * 3
+            previous_meals = self.history_features.recent_meals()
+            if len(previous_meals) < 3:
+                previous_meals = [list(self.known_meals)[0]] * 3
             
         if daily_nutrition is None:
             daily_nutrition = {'calories': 0, 'protein': 0, 'carbs': 0, 'fiber': 0}
@@ -480,7 +675,7 @@ class MealPredictionModel:
             weekly_nutrition = {}
         
         # Get base predictions from the model
-        pred_df = self._prepare_prediction_data(date, previous_meals)
+        pred_df = self._prepare_prediction_data(date, previous_meals, daily_nutrition)
         base_probabilities = self.model.predict_proba(self._prepare_features(pred_df))
         
         # Calculate final scores with all optimizers
@@ -526,7 +721,7 @@ class MealPredictionModel:
             nutrition = NUTRITION_INFO.get(meal, DEFAULT_NUTRITION)
             predictions.append({
                 'meal': meal,
-                'probability': score,
+                'probability': float(score),
                 'nutrition': nutrition,
                 'seasonal_ingredients': nutrition['seasonal_ingredients'].get(
                     self.seasonality_optimizer._get_indian_season(date), []
@@ -661,7 +856,11 @@ def save_model(model, file_path):
         'model': model.model,
         'label_encoder': model.label_encoder,
         'scaler': model.scaler,
-        'indian_holidays': model.indian_holidays
+        'indian_holidays': model.indian_holidays,
+        'feature_cols': model.feature_cols,
+        'history_features': model.history_features,
+        'known_meals': model.known_meals,
+        'meal_combinations': model.meal_combinations
     }
     
     with open(file_path, 'wb') as f:
@@ -689,5 +888,9 @@ def load_model(file_path):
     model.label_encoder = model_data['label_encoder']
     model.scaler = model_data['scaler']
     model.indian_holidays = model_data['indian_holidays']
+    model.feature_cols = model_data['feature_cols']
+    model.history_features = model_data['history_features']
+    model.known_meals = model_data['known_meals']
+    model.meal_combinations = model_data['meal_combinations']
     
     return model
\ No newline at end of file
@@ -0,0 +1,354 @@
+"""
+Offline load test for the meal prediction Flask API.
+
+Boots app.py in a child process from a synthetic pre-trained artifact (no
+meals.csv needed), drives concurrent mixed traffic at a fixed request rate
+and reports throughput, latency percentiles, error rates and memory growth
+per endpoint. Exits non-zero when a gate threshold is exceeded so it can be
+used to gate releases.
+
+Usage:
+    python load_test.py --rate 50 --duration 30 --concurrency 16
+    python load_test.py --max-error-rate 0.01 --max-p99-ms 500 --json report.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ENDPOINTS = {
+    'predict_meal': 4,
+    'update_preferences': 2,
+    'seasonal_ingredients': 1,
+    'nutrition_stats': 1
+}
+
+SYNTHETIC_MEALS = [
+    'Sambar Rice', 'Dosa', 'Idli', 'biryani', 'Upma', 'Pongal',
+    'Lemon Rice', 'Curd Rice', 'Vegetable Kurma', 'chole bhathure'
+]
+
+MIN_ROWS_PER_MEAL = 3
+
+HEALTH_GOALS = ['weight_loss', 'muscle_gain', 'diabetes_friendly', 'heart_healthy']
+ALLERGENS = ['fenugreek', 'spices', 'drumstick', 'carrot']
+DIETARY_TYPES = ['vegetarian', 'non-vegetarian', 'vegan']
+MEAL_SIZES = ['small', 'medium', 'large']
+MEAL_TIMES = ['breakfast', 'lunch', 'dinner']
+
+
+def build_synthetic_artifact(file_path, days=365, seed=42):
+    """Train a small model on a synthetic meal log and save it with save_model"""
+    import numpy as np
+    import pandas as pd
+    import app
+
+    rng = np.random.default_rng(seed)
+    weights = rng.dirichlet(np.ones(len(SYNTHETIC_MEALS)) * 2)
+    # Every meal needs a few rows for the stratified split in train()
+    guaranteed = np.tile(SYNTHETIC_MEALS, MIN_ROWS_PER_MEAL)
+    drawn = rng.choice(SYNTHETIC_MEALS, size=days - len(guaranteed), p=weights)
+    df = pd.DataFrame({
+        'Date': pd.date_range('2024-01-01', periods=days, freq='D'),
+        'Meal': rng.permutation(np.concatenate([guaranteed, drawn]))
+    })
+
+    model = app.MealPredictionModel(n_estimators=20)
+    model.train(df)
+    app.save_model(model, file_path)
+
+
+def _serve(artifact_path, port):
+    """Child process entry point: load the artifact and serve the Flask app"""
+    from werkzeug.serving import make_server
+    import app
+
+    # Per-request access logs would drown the report; errors still get logged
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app.model = app.load_model(artifact_path)
+    make_server('127.0.0.1', port, app.app, threaded=True).serve_forever()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _rss_kb(server):
+    """Resident set size of the server process in KiB, read from /proc (Linux only)"""
+    try:
+        if server.is_alive():
+            with open(f'/proc/{server.pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    raise RuntimeError(f"API server exited during the run (exit code {server.exitcode})")
+
+
+def _wait_until_ready(base_url, server, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not server.is_alive():
+            raise RuntimeError("API server exited during startup")
+        try:
+            urllib.request.urlopen(f'{base_url}/api/nutrition_stats', timeout=1).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError(f"API server did not become ready within {timeout}s")
+
+
+def _clock(rng, start_hour, end_hour):
+    return f"{rng.randint(start_hour, end_hour):02d}:{rng.choice([0, 15, 30, 45]):02d}"
+
+
+def random_preferences(rng):
+    """Generate a payload shaped like saveUserPreferences() in static/js/main.js"""
+    # The allergies field is a comma-separated text box, so empty input posts ['']
+    allergies = rng.sample(ALLERGENS, rng.choice([0, 0, 0, 1, 2])) or ['']
+    return {
+        'dietary_type': rng.choice(DIETARY_TYPES),
+        'meal_size': rng.choice(MEAL_SIZES),
+        'allergies': allergies,
+        'health_goals': rng.sample(HEALTH_GOALS, rng.randint(0, 2)),
+        'preferred_meals': rng.sample(SYNTHETIC_MEALS, rng.randint(0, 3)),
+        'meal_times': {
+            'breakfast': _clock(rng, 6, 10),
+            'lunch': _clock(rng, 12, 14),
+            'dinner': _clock(rng, 19, 22)
+        },
+        'nutrition_targets': {
+            'calories': rng.randrange(1600, 2800, 100),
+            'protein': rng.randrange(40, 120, 5)
+        }
+    }
+
+
+def build_request(endpoint, base_url, rng):
+    """Return a urllib Request for one call to the given endpoint"""
+    if endpoint == 'predict_meal':
+        # The UI only sends meal_time; preferences go through update_preferences
+        params = {'meal_time': rng.choice(MEAL_TIMES)}
+        return urllib.request.Request(
+            f'{base_url}/api/predict_meal?{urllib.parse.urlencode(params)}'
+        )
+    if endpoint == 'update_preferences':
+        return urllib.request.Request(
+            f'{base_url}/api/update_preferences',
+            data=json.dumps(random_preferences(rng)).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+    return urllib.request.Request(f'{base_url}/api/{endpoint}')
+
+
+class EndpointStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, latency, ok):
+        with self.lock:
+            self.latencies[endpoint].append(latency)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+def _call(endpoint, request, scheduled, stats, timeout):
+    ok = True
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+    except (OSError, http.client.HTTPException):
+        ok = False
+    # Measured from the scheduled send time so a slow server can't hide queueing
+    stats.record(endpoint, time.monotonic() - scheduled, ok)
+
+
+def run_load(base_url, endpoints, rate, duration, concurrency, seed, timeout):
+    """Issue requests open-loop at a fixed rate and collect per-endpoint stats"""
+    rng = random.Random(seed)
+    names, weights = list(endpoints), list(endpoints.values())
+    stats = EndpointStats()
+    total = int(rate * duration)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            endpoint = rng.choices(names, weights)[0]
+            request = build_request(endpoint, base_url, rng)
+            pool.submit(_call, endpoint, request, scheduled, stats, timeout)
+    elapsed = time.monotonic() - start
+
+    return stats, elapsed
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(stats, elapsed, memory_growth):
+    """Build the per-endpoint report"""
+    report = {}
+    for endpoint, latencies in sorted(stats.latencies.items()):
+        latencies = sorted(latencies)
+        count = len(latencies)
+        report[endpoint] = {
+            'requests': count,
+            'throughput_rps': count / elapsed if elapsed else 0.0,
+            'error_rate': stats.errors[endpoint] / count if count else 0.0,
+            'p50_ms': _percentile(latencies, 50) * 1000,
+            'p90_ms': _percentile(latencies, 90) * 1000,
+            'p99_ms': _percentile(latencies, 99) * 1000,
+            'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+            'memory_growth_kb': memory_growth.get(endpoint, 0)
+        }
+    return report
+
+
+def print_report(report, rss_start, rss_end):
+    header = f"{'endpoint':<22}{'reqs':>7}{'rps':>8}{'err%':>7}{'p50ms':>9}{'p90ms':>9}{'p99ms':>9}{'maxms':>9}{'memKB':>9}"
+    print(header)
+    print('-' * len(header))
+    for endpoint, row in report.items():
+        print(
+            f"{endpoint:<22}{row['requests']:>7}{row['throughput_rps']:>8.1f}"
+            f"{row['error_rate'] * 100:>7.2f}{row['p50_ms']:>9.1f}{row['p90_ms']:>9.1f}"
+            f"{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}{row['memory_growth_kb']:>9}"
+        )
+    print(f"\nServer RSS: {rss_start} KiB -> {rss_end} KiB ({rss_end - rss_start:+} KiB)")
+
+
+def check_gates(report, max_error_rate, max_p99_ms):
+    """Return a list of gate violations"""
+    failures = []
+    for endpoint, row in report.items():
+        if max_error_rate is not None and row['error_rate'] > max_error_rate:
+            failures.append(f"{endpoint}: error rate {row['error_rate']:.2%} > {max_error_rate:.2%}")
+        if max_p99_ms is not None and row['p99_ms'] > max_p99_ms:
+            failures.append(f"{endpoint}: p99 {row['p99_ms']:.1f}ms > {max_p99_ms}ms")
+    return failures
+
+
+def validate_mix(mix):
+    """Return the endpoints with positive weight, or raise ValueError for a bad --mix"""
+    if not isinstance(mix, dict) or not mix:
+        raise ValueError("--mix must be a non-empty JSON object")
+    unknown = set(mix) - set(ENDPOINTS)
+    if unknown:
+        raise ValueError(f"Unknown endpoints in --mix: {', '.join(sorted(unknown))}")
+    for endpoint, weight in mix.items():
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+            raise ValueError(f"Weight for {endpoint} must be a non-negative number, got {weight!r}")
+    active = {endpoint: weight for endpoint, weight in mix.items() if weight > 0}
+    if not active:
+        raise ValueError("--mix needs at least one endpoint with a positive weight")
+    return active
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test for the meal prediction API")
+    parser.add_argument('--rate', type=float, default=50, help="requests per second across all endpoints")
+    parser.add_argument('--duration', type=float, default=30, help="seconds of mixed traffic")
+    parser.add_argument('--concurrency', type=int, default=16, help="maximum in-flight requests")
+    parser.add_argument('--mix', type=json.loads, default=ENDPOINTS,
+                        help='endpoint weights as JSON, e.g. \'{"predict_meal": 1}\'')
+    parser.add_argument('--warmup-requests', type=int, default=50,
+                        help="requests per endpoint sent before any memory reading")
+    parser.add_argument('--memory-requests', type=int, default=200,
+                        help="requests per endpoint in the isolated memory growth phase")
+    parser.add_argument('--artifact', help="use an existing save_model artifact instead of a synthetic one")
+    parser.add_argument('--timeout', type=float, default=10, help="per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="write the report to this file")
+    parser.add_argument('--max-error-rate', type=float, help="fail if any endpoint exceeds this error rate")
+    parser.add_argument('--max-p99-ms', type=float, help="fail if any endpoint exceeds this p99 latency")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        args.mix = validate_mix(args.mix)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        artifact = args.artifact
+        if artifact is None:
+            artifact = os.path.join(tmp_dir, 'synthetic_model.pkl')
+            build_synthetic_artifact(artifact, seed=args.seed)
+
+        port = _free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        server = multiprocessing.get_context('spawn').Process(
+            target=_serve, args=(artifact, port), daemon=True
+        )
+        server.start()
+        try:
+            _wait_until_ready(base_url, server)
+
+            # Warm every endpoint first so first-touch allocations aren't
+            # charged to whichever endpoint is measured first
+            for endpoint in args.mix:
+                run_load(base_url, {endpoint: 1}, args.rate, args.warmup_requests / args.rate,
+                         args.concurrency, args.seed, args.timeout)
+
+            # Memory growth is attributed by driving each endpoint on its own
+            memory_growth = {}
+            for endpoint in args.mix:
+                before = _rss_kb(server)
+                run_load(base_url, {endpoint: 1}, args.rate, args.memory_requests / args.rate,
+                         args.concurrency, args.seed, args.timeout)
+                memory_growth[endpoint] = _rss_kb(server) - before
+
+            rss_start = _rss_kb(server)
+            stats, elapsed = run_load(base_url, args.mix, args.rate, args.duration,
+                                      args.concurrency, args.seed, args.timeout)
+            rss_end = _rss_kb(server)
+        except RuntimeError as e:
+            print(f"GATE FAILED: {e}", file=sys.stderr)
+            return 1
+        finally:
+            server.terminate()
+            server.join()
+
+    report = summarize(stats, elapsed, memory_growth)
+    print_report(report, rss_start, rss_end)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'endpoints': report, 'rss_start_kb': rss_start, 'rss_end_kb': rss_end}, f, indent=2)
+
+    failures = check_gates(report, args.max_error_rate, args.max_p99_ms)
+    for failure in failures:
+        print(f"GATE FAILED: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
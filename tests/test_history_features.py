@@ -0,0 +1,102 @@
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import MealHistoryFeatures
+
+
+def _meal_log(days=120, seed=0):
+    """Random log with gaps between days and several meals on some days"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(
+        np.sort(rng.integers(0, days, size=days)), unit='D'
+    )
+    meals = rng.choice(['Dosa', 'Idli', 'Upma', 'Pongal', 'biryani'], size=days)
+    return pd.DataFrame({'Date': dates, 'Meal': meals})
+
+
+def _brute_force(df, date, meal, history):
+    past = df[(df['Meal'] == meal) & (df['Date'] < date)]
+    row = {f'count_{w}': int((past['Date'] >= date - pd.Timedelta(days=w)).sum())
+           for w in history.windows}
+    days_since = (date - past['Date'].max()).days if len(past) else history.max_gap_days
+    row['days_since'] = min(days_since, history.max_gap_days)
+    row['recency'] = history.recency_decay ** row['days_since'] if len(past) else 0.0
+    return row
+
+
+def test_transform_matches_brute_force():
+    df = _meal_log()
+    history = MealHistoryFeatures().fit(df['Date'], df['Meal'])
+    query = pd.Series(list(df['Date']) + [df['Date'].max() + pd.Timedelta(days=10)])
+    features = history.transform(query)
+
+    for row, date in query.items():
+        for i, meal in enumerate(history.meals):
+            expected = _brute_force(df, date, meal, history)
+            for window in history.windows:
+                assert features.loc[row, f'hist_count_{window}d_{i}'] == expected[f'count_{window}']
+            assert features.loc[row, f'hist_days_since_{i}'] == expected['days_since']
+            assert np.isclose(features.loc[row, f'hist_recency_{i}'], expected['recency'])
+
+
+def test_update_matches_refit():
+    df = _meal_log()
+    history = MealHistoryFeatures().fit(df['Date'], df['Meal'])
+    end = df['Date'].max()
+    served = [(end + pd.Timedelta(days=3), 'Idli'),
+              (end - pd.Timedelta(days=5), 'Upma'),
+              (end + pd.Timedelta(days=40), 'Dosa')]
+    for date, meal in served:
+        history.update(date, meal)
+
+    extended = pd.concat(
+        [df, pd.DataFrame(served, columns=['Date', 'Meal'])], ignore_index=True
+    )
+    refit = MealHistoryFeatures().fit(extended['Date'], extended['Meal'])
+    query = pd.Series(pd.date_range(end - pd.Timedelta(days=30), periods=90, freq='D'))
+    pd.testing.assert_frame_equal(history.transform(query), refit.transform(query))
+    # The back-filled Upma is older than the latest serving, so it is not recent
+    assert history.recent_meals() == ['Dosa', 'Idli', df['Meal'].iloc[-1]]
+
+
+def test_update_rejects_unknown_meals_and_far_future_dates():
+    df = _meal_log()
+    history = MealHistoryFeatures().fit(df['Date'], df['Meal'])
+    shape = history._prefix_counts.shape
+
+    with pytest.raises(ValueError):
+        history.update(df['Date'].max(), 'Pizza')
+    with pytest.raises(ValueError):
+        history.update(df['Date'].max() + pd.Timedelta(days=history.max_gap_days + 1), 'Idli')
+    with pytest.raises(ValueError):
+        history.update(pd.Timestamp('9999-12-31'), 'Idli')
+    with pytest.raises(ValueError):
+        history.update(df['Date'].min() - pd.Timedelta(days=1), 'Idli')
+    assert history._prefix_counts.shape == shape
+
+
+def test_pickle_round_trip():
+    df = _meal_log()
+    history = MealHistoryFeatures().fit(df['Date'], df['Meal'])
+    restored = pickle.loads(pickle.dumps(history))
+    restored.update(df['Date'].max() + pd.Timedelta(days=1), 'Idli')
+    assert restored.transform(df['Date']).equals(history.transform(df['Date']))
+
+
+def test_recent_meals_match_training_shift():
+    df = pd.DataFrame({
+        'Date': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-02', '2024-01-03']),
+        'Meal': ['Idli', 'Upma', 'Dosa', 'Dosa']
+    })
+    history = MealHistoryFeatures().fit(df['Date'], df['Meal'])
+    assert history.recent_meals() == ['Dosa', 'Dosa', 'Upma']
+
+    history.update(pd.Timestamp('2024-01-03'), 'Idli')
+    assert history.recent_meals() == ['Idli', 'Dosa', 'Dosa']
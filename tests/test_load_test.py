@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import EndpointStats, _percentile, check_gates, summarize, validate_mix
+
+
+def _stats(latencies_by_endpoint, errors_by_endpoint=None):
+    stats = EndpointStats()
+    errors_by_endpoint = errors_by_endpoint or {}
+    for endpoint, latencies in latencies_by_endpoint.items():
+        for i, latency in enumerate(latencies):
+            stats.record(endpoint, latency, i >= errors_by_endpoint.get(endpoint, 0))
+    return stats
+
+
+def test_percentile():
+    values = [i / 1000 for i in range(1, 101)]
+    assert _percentile(values, 50) == pytest.approx(0.050, abs=0.001)
+    assert _percentile(values, 99) == pytest.approx(0.099, abs=0.001)
+    assert _percentile(values, 100) == 0.100
+    assert _percentile([0.2], 99) == 0.2
+    assert _percentile([], 50) == 0.0
+
+
+def test_summarize():
+    stats = _stats({'predict_meal': [0.010, 0.020, 0.030, 0.040]}, {'predict_meal': 1})
+    report = summarize(stats, elapsed=2.0, memory_growth={'predict_meal': 128})
+    row = report['predict_meal']
+    assert row['requests'] == 4
+    assert row['throughput_rps'] == 2.0
+    assert row['error_rate'] == 0.25
+    assert row['max_ms'] == pytest.approx(40.0)
+    assert row['memory_growth_kb'] == 128
+
+
+def test_check_gates():
+    stats = _stats({
+        'predict_meal': [0.5] * 10,
+        'nutrition_stats': [0.001] * 10
+    }, {'nutrition_stats': 2})
+    report = summarize(stats, elapsed=1.0, memory_growth={})
+
+    assert check_gates(report, None, None) == []
+    assert check_gates(report, 0.5, 1000) == []
+    failures = check_gates(report, 0.1, 100)
+    assert len(failures) == 2
+    assert failures[0].startswith('nutrition_stats: error rate')
+    assert failures[1].startswith('predict_meal: p99')
+
+
+def test_validate_mix():
+    assert validate_mix({'predict_meal': 2, 'nutrition_stats': 0}) == {'predict_meal': 2}
+    for mix in [{}, [], {'predict_meal': 0}, {'predict_meal': -1},
+                {'predict_meal': 'a'}, {'predict_meal': True}, {'unknown': 1}]:
+        with pytest.raises(ValueError):
+            validate_mix(mix)